@@ -13,12 +13,42 @@ correctly via type coercion, so we don't force quotes on output.
 """
 
 import sys
+import os
+import stat
+import signal
+import struct
+import argparse
+import contextlib
+import socket
+import socketserver
 import yaml
 import plistlib
 import json
 import io
+import re
+import codecs
+import datetime
+import itertools
+import hashlib
+import tempfile
+import time
+import shutil
 from pathlib import Path
 
+# Prefer the libyaml-backed loader/dumper; the pure-Python parser is several
+# times slower on large pkginfo files.
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+    print("Warning: PyYAML was built without libyaml, using the slower pure-Python parser", file=sys.stderr)
+
+# orjson is optional; it serializes JSON much faster and emits UTF-8 bytes directly
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Custom representer for multiline strings to use block scalar style
 def str_representer(dumper, data):
     """Use literal block style (|) for multiline strings, plain style otherwise."""
@@ -36,7 +66,7 @@ def str_representer(dumper, data):
     return dumper.represent_scalar('tag:yaml.org,2002:str', data)
 
 # Create a custom dumper class that uses block scalars for multiline strings
-class BlockScalarDumper(yaml.SafeDumper):
+class BlockScalarDumper(SafeDumper):
     """Custom YAML dumper that uses block scalar style for multiline strings."""
     pass
 
@@ -61,28 +91,124 @@ CONDITIONAL_ITEM_KEY_ORDER = ['condition', 'managed_installs', 'managed_uninstal
                               'optional_installs', 'default_installs', 'featured_items',
                               'included_manifests', 'conditional_items']
 
+# Position lookups for the key orders above, so sorting doesn't rescan the lists
+PRIORITY_KEY_INDEX = {key: index for index, key in enumerate(PRIORITY_KEYS)}
+LAST_KEY_INDEX = {key: index for index, key in enumerate(LAST_KEYS)}
+RECEIPT_KEY_INDEX = {key: index for index, key in enumerate(RECEIPT_KEY_ORDER)}
+INSTALLS_KEY_INDEX = {key: index for index, key in enumerate(INSTALLS_KEY_ORDER)}
+CONDITIONAL_ITEM_KEY_INDEX = {key: index for index, key in enumerate(CONDITIONAL_ITEM_KEY_ORDER)}
+
 # Keys that only appear at the top level of a manifest (never inside a conditional_items block).
 # `catalogs` is the strongest signal — conditional blocks don't override catalogs.
-MANIFEST_TOP_LEVEL_KEYS = {'catalogs'}
+MANIFEST_TOP_LEVEL_KEYS = frozenset({'catalogs'})
+
+# Manifest-style keys that mark an unconditional block inside conditional_items
+CONDITIONAL_BLOCK_KEYS = frozenset({'managed_installs', 'managed_uninstalls', 'managed_updates',
+                                    'optional_installs', 'included_manifests', 'conditional_items'})
+
+# On-disk cache of parsed YAML files, stored as binary plists. The directory
+# can be deleted at any time; it is rebuilt on demand.
+# Bump PARSE_CACHE_VERSION whenever parsing behaviour changes so stale entries are ignored.
+PARSE_CACHE_DIR = Path.home() / 'Library' / 'Caches' / 'MunkiAdmin' / 'yaml_bridge'
+PARSE_CACHE_VERSION = 1
+
+# Entries unused for this long are pruned (edited files leave their old entry
+# behind); pruning runs at most once per interval
+PARSE_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+PARSE_CACHE_PRUNE_INTERVAL = 24 * 60 * 60
+PARSE_CACHE_PRUNE_MARKER = '.last_prune'
+
+def parse_cache_path(file_path, file_stat):
+    """Return the cache file for a YAML file, keyed by path, mtime and size."""
+    key_source = f"v{PARSE_CACHE_VERSION}:{file_path.resolve()}:{file_stat.st_mtime_ns}:{file_stat.st_size}"
+    key = hashlib.blake2b(key_source.encode('utf-8'), digest_size=20).hexdigest()
+    return PARSE_CACHE_DIR / f"{key}.plist"
+
+def load_cached_parse(cache_path):
+    """Load a previously cached parse result, or None on a cache miss."""
+    try:
+        with open(cache_path, 'rb') as file:
+            data = plistlib.load(file)
+    except Exception:
+        return None
+    # Mark the entry as recently used so pruning keeps it
+    with contextlib.suppress(OSError):
+        os.utime(cache_path)
+    return data
+
+def prune_parse_cache(cache_dir):
+    """Remove cache entries unused for PARSE_CACHE_MAX_AGE, at most once per PARSE_CACHE_PRUNE_INTERVAL."""
+    now = time.time()
+    marker = cache_dir / PARSE_CACHE_PRUNE_MARKER
+    try:
+        if now - marker.stat().st_mtime < PARSE_CACHE_PRUNE_INTERVAL:
+            return
+    except FileNotFoundError:
+        pass
+    marker.touch()
+    
+    for entry in os.scandir(cache_dir):
+        if not entry.name.endswith(('.plist', '.tmp')):
+            continue
+        with contextlib.suppress(OSError):
+            if now - entry.stat().st_mtime > PARSE_CACHE_MAX_AGE:
+                os.unlink(entry.path)
+
+def store_cached_parse(cache_path, data):
+    """Atomically write a parse result to the cache.
+    
+    Only data that survives a plist round trip unchanged is cached (no None
+    values, non-string keys or timezone-aware dates), so a cache hit always
+    returns exactly what the YAML parser would have.
+    """
+    try:
+        blob = plistlib.dumps(data, fmt=plistlib.FMT_BINARY, sort_keys=False)
+        if plistlib.loads(blob) != data:
+            return
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=cache_path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(blob)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        prune_parse_cache(cache_path.parent)
+    except Exception:
+        # The cache is best effort only
+        pass
+
+# Matches any line longer than preprocess_yaml's 10000 character limit
+LONG_LINE_PATTERN = re.compile(r'[^\r\n]{10001}')
+
+# Matches a YAML document separator line (`---` on its own)
+DOCUMENT_SEPARATOR_PATTERN = re.compile(r'^[ \t]*---[ \t\r]*$', re.MULTILINE)
 
 class RobustYAMLLoader:
     """A robust YAML loader that handles common real-world issues"""
     
     @staticmethod
-    def safe_load_yaml(content):
-        """Safely load YAML with multiple fallback strategies"""
+    def safe_load_yaml(content, first_error=None):
+        """Safely load YAML with multiple fallback strategies
         
-        # Strategy 1: Try standard safe_load first
-        try:
-            return yaml.safe_load(content)
-        except yaml.YAMLError as e:
-            print(f"Standard YAML parsing failed: {e}", file=sys.stderr)
+        If a standard load of this exact content has already failed, pass its
+        error as `first_error` to skip straight to the fallbacks.
+        """
+        
+        # Strategy 1: Try a standard safe load first
+        if first_error is None:
+            try:
+                return yaml.load(content, Loader=SafeLoader)
+            except yaml.YAMLError as e:
+                first_error = e
+        print(f"Standard YAML parsing failed: {first_error}", file=sys.stderr)
         
         # Strategy 2: Try with custom loader for common issues
         try:
             # Handle common munki-specific YAML issues
             content = RobustYAMLLoader.preprocess_yaml(content)
-            return yaml.safe_load(content)
+            return yaml.load(content, Loader=SafeLoader)
         except yaml.YAMLError as e:
             print(f"Preprocessed YAML parsing failed: {e}", file=sys.stderr)
         
@@ -97,10 +223,22 @@ class RobustYAMLLoader:
     @staticmethod
     def preprocess_yaml(content):
         """Preprocess YAML content to handle common issues"""
-        lines = content.splitlines()
-        processed_lines = []
+        # Tabs in pkginfo YAML are indentation mistakes rather than column
+        # alignment, so replace them all in one pass
+        content = content.replace('\t', '  ')
+        
+        # Nothing else to fix unless there are excessively long lines
+        if not LONG_LINE_PATTERN.search(content):
+            return content
         
-        for line_num, line in enumerate(lines, 1):
+        # Stream line by line rather than building a list of every line;
+        # universal newlines mode turns \r\n and \r endings into \n
+        processed = io.StringIO()
+        
+        for line_num, line in enumerate(io.StringIO(content, newline=None), 1):
+            line_ending = '\n' if line.endswith('\n') else ''
+            line = line[:len(line) - len(line_ending)]
+            
             # Handle excessively long lines by truncating at word boundaries
             if len(line) > 10000:
                 # Find last word boundary before limit
@@ -116,21 +254,10 @@ class RobustYAMLLoader:
                     line = line[:9000] + "..."
                     print(f"Warning: Hard truncated line {line_num}", file=sys.stderr)
             
-            # Handle tab characters
-            if '\t' in line:
-                line = line.expandtabs(2)
-            
-            # Handle some common encoding issues
-            try:
-                line.encode('utf-8')
-            except UnicodeEncodeError:
-                # Replace problematic characters
-                line = line.encode('utf-8', errors='replace').decode('utf-8')
-                print(f"Warning: Fixed encoding issues on line {line_num}", file=sys.stderr)
-            
-            processed_lines.append(line)
+            processed.write(line)
+            processed.write(line_ending)
         
-        return '\n'.join(processed_lines)
+        return processed.getvalue()
     
     @staticmethod
     def parse_chunked_yaml(content):
@@ -138,31 +265,30 @@ class RobustYAMLLoader:
         # This is a simplified approach - split into logical YAML sections
         # and try to parse each section separately if the full parse fails
         
-        lines = content.splitlines()
-        if len(lines) < 100:
+        line_count = content.count('\n') + (not content.endswith('\n'))
+        if line_count < 100:
             # For small files, just fail normally
-            return yaml.safe_load(content)
+            return yaml.load(content, Loader=SafeLoader)
         
-        # Try to identify YAML document boundaries
+        # Try to identify YAML document boundaries and slice the documents
+        # straight out of the content. A separator on the very first line
+        # just starts the first document.
         yaml_docs = []
-        current_doc = []
+        doc_start = 0
         
-        for line in lines:
-            if line.strip() == '---' and current_doc:
-                # Found document separator
-                yaml_docs.append('\n'.join(current_doc))
-                current_doc = []
-            else:
-                current_doc.append(line)
+        for separator in DOCUMENT_SEPARATOR_PATTERN.finditer(content):
+            if separator.start() == 0:
+                continue
+            yaml_docs.append(content[doc_start:separator.start()])
+            doc_start = separator.end()
         
-        if current_doc:
-            yaml_docs.append('\n'.join(current_doc))
+        yaml_docs.append(content[doc_start:])
         
         # If we found multiple documents, try to parse the first valid one
         if len(yaml_docs) > 1:
             for i, doc in enumerate(yaml_docs):
                 try:
-                    result = yaml.safe_load(doc)
+                    result = yaml.load(doc, Loader=SafeLoader)
                     if result is not None:
                         print(f"Successfully parsed YAML document {i+1} of {len(yaml_docs)}", file=sys.stderr)
                         return result
@@ -172,7 +298,37 @@ class RobustYAMLLoader:
         # Fall back to original content
         raise yaml.YAMLError("All chunked parsing attempts failed")
 
-def yaml_to_dict(yaml_file_path):
+# Byte order marks and the encodings they identify. UTF-32 comes first
+# because the UTF-32 LE mark begins with the UTF-16 LE one.
+BOM_ENCODINGS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+def decode_yaml_bytes(raw_content):
+    """Decode YAML file contents, picking the encoding from the BOM if there is one.
+    
+    Without a BOM the file is decoded as UTF-8, falling back to cp1252 (the
+    usual encoding of files saved by older Windows editors) and finally
+    latin1, which accepts any byte sequence.
+    
+    Returns a (content, encoding) tuple.
+    """
+    for bom, encoding in BOM_ENCODINGS:
+        if raw_content.startswith(bom):
+            return raw_content.decode(encoding, errors='replace'), encoding
+    
+    for encoding in ('utf-8', 'cp1252'):
+        try:
+            return raw_content.decode(encoding), encoding
+        except UnicodeDecodeError:
+            continue
+    return raw_content.decode('latin1'), 'latin1'
+
+def yaml_to_dict(yaml_file_path, use_cache=True):
     """Convert YAML file to Python dictionary with robust error handling"""
     try:
         # Basic file checks
@@ -181,62 +337,133 @@ def yaml_to_dict(yaml_file_path):
             print(f"Error: File not found: {yaml_file_path}", file=sys.stderr)
             return None
         
-        file_size = file_path.stat().st_size
+        file_stat = file_path.stat()
+        file_size = file_stat.st_size
         
         # More reasonable size limits
         if file_size > 50 * 1024 * 1024:  # 50MB absolute limit
             print(f"Error: YAML file too large ({file_size} bytes)", file=sys.stderr)
             return None
         
-        # Read file with robust encoding handling
-        content = None
-        encodings = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252']
+        # Reuse an earlier parse if the file hasn't changed since
+        cache_path = parse_cache_path(file_path, file_stat) if use_cache else None
+        if cache_path is not None:
+            data = load_cached_parse(cache_path)
+            if data is not None:
+                return data
         
-        for encoding in encodings:
-            try:
-                with open(yaml_file_path, 'r', encoding=encoding) as file:
-                    content = file.read()
-                break
-            except UnicodeDecodeError:
-                continue
+        # Common case: stream the file straight into the parser. It decodes
+        # the bytes itself, so the file is never held as a separate str too.
+        stream_error = None
+        try:
+            with open(file_path, 'rb') as file:
+                data = yaml.load(file, Loader=SafeLoader)
+        except yaml.YAMLError as e:
+            data = None
+            stream_error = e
         
-        if content is None:
-            print(f"Error: Unable to decode file with any supported encoding", file=sys.stderr)
-            return None
+        if data is not None:
+            if cache_path is not None:
+                store_cached_parse(cache_path, data)
+            return data
+        
+        # Otherwise read file with robust encoding handling and retry with
+        # the fallback strategies (empty files also end up here)
+        content, encoding = decode_yaml_bytes(file_path.read_bytes())
         
         # Handle empty files
         if not content.strip():
             print("Warning: Empty YAML file", file=sys.stderr)
             return {}
         
-        # Use robust YAML loader
-        return RobustYAMLLoader.safe_load_yaml(content)
+        # Use robust YAML loader. Plain UTF-8 content is exactly what the
+        # streamed parse just saw, so its standard load isn't repeated.
+        first_error = stream_error if encoding == 'utf-8' else None
+        data = RobustYAMLLoader.safe_load_yaml(content, first_error=first_error)
+        if cache_path is not None and data is not None:
+            store_cached_parse(cache_path, data)
+        return data
             
     except Exception as e:
         print(f"Error reading YAML file: {e}", file=sys.stderr)
         return None
 
-def dict_to_plist_string(data):
-    """Convert Python dictionary to property list XML string"""
+def write_plist(data, output_file, fmt=plistlib.FMT_BINARY):
+    """Write Python dictionary as a property list (binary by default) to a binary file object.
+    
+    The plist is built in memory and written in one go: the binary writer
+    records absolute tell() offsets, which are wrong for pipes and appended
+    (O_APPEND) output, and a failed serialization must not leave a partial
+    plist behind. Returns True on success.
+    """
     try:
         # Remove order preservation markers before converting to plist
-        cleaned_data = remove_order_markers(data)
-        return plistlib.dumps(cleaned_data).decode('utf-8')
+        cleaned_data = _clean_dict(data)
+        output_file.write(plistlib.dumps(cleaned_data, fmt=fmt))
+        return True
     except Exception as e:
         print(f"Error converting to plist: {e}", file=sys.stderr)
-        return None
+        return False
+
+def json_default(value):
+    """Serialize YAML dates and timestamps as RFC 3339 strings, like orjson does"""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
 
-def remove_order_markers(data):
-    """Remove __ordered_keys__ markers from data structure"""
+def dict_to_json_bytes(data):
+    """Convert Python dictionary to 2-space indented UTF-8 JSON bytes.
+    
+    orjson is used when it produces the same output as json.dumps. It
+    rejects integers beyond 64 bits and silently writes NaN/Infinity as
+    null, so those cases (any `null` in its output) go through json.dumps.
+    """
+    if orjson is not None:
+        try:
+            result = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson.JSONEncodeError is a TypeError subclass
+            result = None
+        if result is not None and b'null' not in result:
+            return result
+    return json.dumps(data, indent=2, ensure_ascii=False, default=json_default).encode('utf-8')
+
+def _clean_dict(data):
+    """Remove __ordered_keys__ markers from data structure in a single pass.
+    
+    Timezone-aware dates (e.g. `creation_date: 2024-01-01T00:00:00Z`) are also
+    converted to naive UTC, since plists have no timezone and the binary
+    writer rejects aware datetimes.
+    
+    Dicts and lists that need no changes are returned as-is instead of being
+    copied; a container is only copied once its first changed entry is found.
+    """
     if isinstance(data, dict):
-        result = {}
-        for key, value in data.items():
+        result = None
+        for index, (key, value) in enumerate(data.items()):
             if key == '__ordered_keys__':
+                if result is None:
+                    result = dict(itertools.islice(data.items(), index))
                 continue
-            result[key] = remove_order_markers(value)
-        return result
+            cleaned = _clean_dict(value)
+            if result is None:
+                if cleaned is value:
+                    continue
+                result = dict(itertools.islice(data.items(), index))
+            result[key] = cleaned
+        return data if result is None else result
     elif isinstance(data, list):
-        return [remove_order_markers(item) for item in data]
+        result = None
+        for index, item in enumerate(data):
+            cleaned = _clean_dict(item)
+            if result is None:
+                if cleaned is item:
+                    continue
+                result = data[:index]
+            result.append(cleaned)
+        return data if result is None else result
+    elif isinstance(data, datetime.datetime) and data.tzinfo is not None:
+        return data.astimezone(datetime.timezone.utc).replace(tzinfo=None)
     else:
         return data
 
@@ -262,46 +489,25 @@ def dict_to_yaml_string(data):
                                default_flow_style=False, allow_unicode=True, sort_keys=False)
         
         # Remove trailing newline added by yaml.dump() to match Swift tool behavior
-        return yaml_string.rstrip('\n')
+        yaml_string = yaml_string.rstrip('\n')
+        # libyaml ends the document with an explicit `...` marker when the last
+        # value is a keep-chomping (|+) block scalar; the pure-Python dumper doesn't
+        if yaml_string.endswith('\n...'):
+            yaml_string = yaml_string[:-len('\n...')].rstrip('\n')
+        return yaml_string
     except Exception as e:
         print(f"Error converting to YAML: {e}", file=sys.stderr)
         return None
 
-def is_receipt_dict(d):
-    """Check if a dictionary looks like a receipt entry."""
-    return isinstance(d, dict) and 'packageid' in d
-
-def is_installs_dict(d):
-    """Check if a dictionary looks like an installs item."""
-    return isinstance(d, dict) and 'path' in d and 'type' in d
-
 def sort_receipt_keys(keys):
     """Sort receipt dictionary keys with packageid first."""
-    ordered = []
-    other = []
-    for key in keys:
-        if key in RECEIPT_KEY_ORDER:
-            ordered.append(key)
-        else:
-            other.append(key)
-    # Sort ordered keys by their position in RECEIPT_KEY_ORDER
-    ordered.sort(key=lambda k: RECEIPT_KEY_ORDER.index(k) if k in RECEIPT_KEY_ORDER else 999)
-    other.sort()
-    return ordered + other
+    # Keys listed in RECEIPT_KEY_ORDER first, in that order, then the rest alphabetically
+    return sorted(keys, key=lambda k: (0, RECEIPT_KEY_INDEX[k]) if k in RECEIPT_KEY_INDEX else (1, k))
 
 def sort_installs_keys(keys):
     """Sort installs item dictionary keys with path first."""
-    ordered = []
-    other = []
-    for key in keys:
-        if key in INSTALLS_KEY_ORDER:
-            ordered.append(key)
-        else:
-            other.append(key)
-    # Sort ordered keys by their position in INSTALLS_KEY_ORDER
-    ordered.sort(key=lambda k: INSTALLS_KEY_ORDER.index(k) if k in INSTALLS_KEY_ORDER else 999)
-    other.sort()
-    return ordered + other
+    # Keys listed in INSTALLS_KEY_ORDER first, in that order, then the rest alphabetically
+    return sorted(keys, key=lambda k: (0, INSTALLS_KEY_INDEX[k]) if k in INSTALLS_KEY_INDEX else (1, k))
 
 def is_conditional_item_dict(d):
     """Check if a dictionary looks like a conditional_items entry (manifest conditional block).
@@ -315,32 +521,22 @@ def is_conditional_item_dict(d):
         return False
     # Top-level manifest keys (e.g. `catalogs`) are the strongest signal this is NOT
     # a conditional block — conditional blocks cannot contain them.
-    if set(d.keys()) & MANIFEST_TOP_LEVEL_KEYS:
+    keys = d.keys()
+    if not keys.isdisjoint(MANIFEST_TOP_LEVEL_KEYS):
         return False
     # A conditional item typically has an explicit "condition" key.
     if 'condition' in d:
         return True
     # Unconditional blocks inside conditional_items arrays: manifest-style keys,
     # no pkginfo keys, no top-level manifest keys (already excluded above).
-    manifest_keys = {'managed_installs', 'managed_uninstalls', 'managed_updates',
-                     'optional_installs', 'included_manifests', 'conditional_items'}
-    has_manifest_keys = bool(set(d.keys()) & manifest_keys)
+    has_manifest_keys = not keys.isdisjoint(CONDITIONAL_BLOCK_KEYS)
     has_pkginfo_keys = 'name' in d or 'version' in d or 'installer_item_location' in d
     return has_manifest_keys and not has_pkginfo_keys
 
 def sort_conditional_item_keys(keys):
     """Sort conditional_items dictionary keys with condition first."""
-    ordered = []
-    other = []
-    for key in keys:
-        if key in CONDITIONAL_ITEM_KEY_ORDER:
-            ordered.append(key)
-        else:
-            other.append(key)
-    # Sort ordered keys by their position in CONDITIONAL_ITEM_KEY_ORDER
-    ordered.sort(key=lambda k: CONDITIONAL_ITEM_KEY_ORDER.index(k) if k in CONDITIONAL_ITEM_KEY_ORDER else 999)
-    other.sort()
-    return ordered + other
+    # Keys listed in CONDITIONAL_ITEM_KEY_ORDER first, in that order, then the rest alphabetically
+    return sorted(keys, key=lambda k: (0, CONDITIONAL_ITEM_KEY_INDEX[k]) if k in CONDITIONAL_ITEM_KEY_INDEX else (1, k))
 
 def sort_pkginfo_keys(keys):
     """Sort pkginfo dictionary keys with custom ordering.
@@ -349,112 +545,380 @@ def sort_pkginfo_keys(keys):
     - _metadata appears last
     - All other keys appear alphabetically in between
     """
-    first_keys = []
-    middle_keys = []
-    end_keys = []
-    
-    for key in keys:
-        if key in PRIORITY_KEYS:
-            first_keys.append(key)
-        elif key in LAST_KEYS:
-            end_keys.append(key)
-        else:
-            middle_keys.append(key)
+    def sort_key(key):
+        if key in PRIORITY_KEY_INDEX:
+            return (0, PRIORITY_KEY_INDEX[key])
+        if key in LAST_KEY_INDEX:
+            return (2, LAST_KEY_INDEX[key])
+        return (1, key)
     
-    # Sort first keys by their position in PRIORITY_KEYS
-    first_keys.sort(key=lambda k: PRIORITY_KEYS.index(k) if k in PRIORITY_KEYS else 999)
+    return sorted(keys, key=sort_key)
+
+def ordered_dict_keys(d):
+    """Return a dictionary's keys in output order, without __ordered_keys__ markers."""
+    keys = d.keys()
     
-    # Sort middle keys alphabetically
-    middle_keys.sort()
+    # Determine sort order based on dict type: receipts have a packageid,
+    # installs items have a path and type
+    if 'packageid' in keys:
+        sort_keys = sort_receipt_keys
+    elif 'path' in keys and 'type' in keys:
+        sort_keys = sort_installs_keys
+    elif is_conditional_item_dict(d):
+        sort_keys = sort_conditional_item_keys
+    else:
+        sort_keys = sort_pkginfo_keys
     
-    # Sort end keys alphabetically
-    end_keys.sort()
+    # Remove order preservation markers (without copying when there are none)
+    if '__ordered_keys__' in keys:
+        keys = [k for k in keys if k != '__ordered_keys__']
     
-    return first_keys + middle_keys + end_keys
+    return sort_keys(keys)
+
+# Deepest nesting order_pkginfo_keys will follow; only reference cycles
+# (possible with YAML anchors) get anywhere near this
+MAX_NESTING_DEPTH = 1000
 
 def order_pkginfo_keys(data):
-    """Recursively order keys in a pkginfo dictionary structure."""
-    if isinstance(data, dict):
-        # Remove order preservation markers
-        clean_data = {k: v for k, v in data.items() if k != '__ordered_keys__'}
-        
-        # Determine sort order based on dict type
-        if is_receipt_dict(clean_data):
-            sorted_keys = sort_receipt_keys(clean_data.keys())
-        elif is_installs_dict(clean_data):
-            sorted_keys = sort_installs_keys(clean_data.keys())
-        elif is_conditional_item_dict(clean_data):
-            sorted_keys = sort_conditional_item_keys(clean_data.keys())
+    """Order keys in a pkginfo dictionary structure, including all nested dicts.
+    
+    Walks the structure with an explicit stack instead of recursing. Each
+    dict or list gets an empty copy that is attached to its parent straight
+    away, so key order is fixed up front and the stack only needs to carry
+    (source, copy) pairs still waiting to be filled in.
+    """
+    stack = []
+    
+    def copy_node(value, depth):
+        if isinstance(value, dict):
+            node = {}
+        elif isinstance(value, list):
+            node = []
         else:
-            sorted_keys = sort_pkginfo_keys(clean_data.keys())
-        
-        # Create ordered dictionary
-        result = {}
-        for key in sorted_keys:
-            value = clean_data[key]
-            result[key] = order_pkginfo_keys(value)
-        
-        return result
-    elif isinstance(data, list):
-        return [order_pkginfo_keys(item) for item in data]
-    else:
-        return data
-
-def main():
-    if len(sys.argv) < 3:
-        print("Usage: yaml_bridge.py <input_file> <output_format>")
-        print("  output_format: plist, json, yaml")
-        sys.exit(1)
+            return value
+        if depth > MAX_NESTING_DEPTH:
+            raise ValueError("Data is nested too deeply or contains a reference cycle")
+        stack.append((value, node, depth))
+        return node
     
-    input_file = sys.argv[1]
-    output_format = sys.argv[2].lower()
+    result = copy_node(data, 0)
+    while stack:
+        source, node, depth = stack.pop()
+        if isinstance(node, dict):
+            for key in ordered_dict_keys(source):
+                node[key] = copy_node(source[key], depth + 1)
+        else:
+            node.extend([copy_node(item, depth + 1) for item in source])
     
-    if not Path(input_file).exists():
-        print(f"Error: File not found: {input_file}", file=sys.stderr)
-        sys.exit(1)
+    return result
+
+# Output formats accepted on the command line; plist means binary plist
+OUTPUT_FORMATS = ('plist', 'plist-binary', 'plist-xml', 'json', 'yaml')
+
+def input_matches_output_format(input_file, output_format):
+    """Check whether the input file is already in the requested output format.
     
-    # Determine input format
-    if input_file.lower().endswith(('.yaml', '.yml')):
-        data = yaml_to_dict(input_file)
-    elif input_file.lower().endswith('.plist'):
+    Returns False for anything that can't be passed through (directories,
+    unreadable files) so the regular load path reports the error.
+    """
+    if not os.path.isfile(input_file):
+        return False
+    lower_name = input_file.lower()
+    if output_format == 'yaml':
+        return lower_name.endswith(('.yaml', '.yml'))
+    if output_format == 'json':
+        return lower_name.endswith('.json')
+    if output_format in ('plist', 'plist-binary', 'plist-xml'):
+        if not lower_name.endswith('.plist'):
+            return False
+        # .plist files can be either flavour, so check the binary header
         try:
             with open(input_file, 'rb') as file:
-                data = plistlib.load(file)
+                is_binary = file.read(8) == b'bplist00'
+        except OSError:
+            return False
+        return is_binary == (output_format != 'plist-xml')
+    return False
+
+def load_input_file(input_file, use_cache=True):
+    """Read a YAML, plist or JSON file into Python data, or None on error"""
+    lower_name = input_file.lower()
+    if lower_name.endswith(('.yaml', '.yml')):
+        return yaml_to_dict(input_file, use_cache=use_cache)
+    elif lower_name.endswith('.plist'):
+        try:
+            with open(input_file, 'rb') as file:
+                return plistlib.load(file)
         except Exception as e:
             print(f"Error reading plist file: {e}", file=sys.stderr)
-            sys.exit(1)
-    elif input_file.lower().endswith('.json'):
+            return None
+    elif lower_name.endswith('.json'):
         try:
             with open(input_file, 'r', encoding='utf-8') as file:
-                data = json.load(file)
+                return json.load(file)
         except Exception as e:
             print(f"Error reading JSON file: {e}", file=sys.stderr)
-            sys.exit(1)
+            return None
     else:
         print("Error: Unsupported input file format", file=sys.stderr)
-        sys.exit(1)
+        return None
+
+def write_converted_file(input_file, output_format, output_file, use_cache=True, normalize=False):
+    """Convert a YAML, plist or JSON file and write the result to a binary file object.
+    
+    Returns True on success, or False on error (the reason is printed to
+    stderr; part of the output may already have been written).
+    """
+    if not Path(input_file).exists():
+        print(f"Error: File not found: {input_file}", file=sys.stderr)
+        return False
     
+    if output_format not in OUTPUT_FORMATS:
+        print("Error: Unsupported output format", file=sys.stderr)
+        return False
+    
+    # Input already in the requested format: copy it through unchanged
+    # instead of parsing and re-serializing (and reordering) it
+    if not normalize and input_matches_output_format(input_file, output_format):
+        try:
+            with open(input_file, 'rb') as file:
+                shutil.copyfileobj(file, output_file)
+            return True
+        except Exception as e:
+            print(f"Error reading input file: {e}", file=sys.stderr)
+            return False
+    
+    data = load_input_file(input_file, use_cache=use_cache)
     if data is None:
-        sys.exit(1)
+        return False
     
     # Convert to requested output format
-    if output_format == 'plist':
-        result = dict_to_plist_string(data)
+    if output_format in ('plist', 'plist-binary'):
+        return write_plist(data, output_file, fmt=plistlib.FMT_BINARY)
+    elif output_format == 'plist-xml':
+        return write_plist(data, output_file, fmt=plistlib.FMT_XML)
     elif output_format == 'json':
         try:
-            result = json.dumps(data, indent=2, ensure_ascii=False)
+            result = dict_to_json_bytes(data)
         except Exception as e:
             print(f"Error converting to JSON: {e}", file=sys.stderr)
-            sys.exit(1)
-    elif output_format == 'yaml':
-        result = dict_to_yaml_string(data)
+            return False
+        output_file.write(result)
+        output_file.write(b'\n')
+        return True
     else:
-        print("Error: Unsupported output format", file=sys.stderr)
+        result = dict_to_yaml_string(data)
+        if not result:
+            return False
+        output_file.write(result.encode('utf-8'))
+        output_file.write(b'\n')
+        return True
+
+def convert_file(input_file, output_format, use_cache=True, normalize=False):
+    """Convert a YAML, plist or JSON file to the requested output format.
+    
+    Returns the serialized output as bytes, or None on error (the reason is
+    printed to stderr).
+    """
+    output = io.BytesIO()
+    if not write_converted_file(input_file, output_format, output,
+                                use_cache=use_cache, normalize=normalize):
+        return None
+    return output.getvalue()
+
+class BridgeRequestHandler(socketserver.StreamRequestHandler):
+    """Handle conversion requests on one connection until the client closes it.
+    
+    Each request is a 4-byte big-endian length followed by a UTF-8 JSON object
+    with `path`, `format` and optionally `normalize`. Each response is a
+    1-byte status (0 on success, 1 on error) and a 4-byte big-endian length,
+    followed by the converted output or the error text.
+    """
+    
+    def handle(self):
+        while True:
+            header = self.rfile.read(4)
+            if len(header) < 4:
+                return
+            (length,) = struct.unpack('>I', header)
+            body = self.rfile.read(length)
+            if len(body) < length:
+                return
+            
+            status, payload = self.convert_request(body)
+            self.wfile.write(struct.pack('>BI', status, len(payload)))
+            self.wfile.write(payload)
+            self.wfile.flush()
+    
+    def convert_request(self, body):
+        """Run one request, capturing anything printed to stderr as the error text"""
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors):
+            try:
+                request = json.loads(body)
+                result = convert_file(request['path'], str(request.get('format', 'plist')).lower(),
+                                      use_cache=self.server.use_cache,
+                                      normalize=bool(request.get('normalize', False)))
+            except Exception as e:
+                print(f"Error: Invalid request: {e}", file=sys.stderr)
+                result = None
+        
+        if result is None:
+            return 1, errors.getvalue().encode('utf-8')
+        return 0, result
+
+class BridgeServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """UNIX socket server that handles each connection in a forked child.
+    
+    A client may keep its connection open for many requests, so connections
+    must not block each other. Forking (rather than threads) also keeps the
+    stderr capture in BridgeRequestHandler private to each connection.
+    """
+    
+    # Don't wait for clients that still hold a connection open when shutting down
+    block_on_close = False
+
+def run_server(socket_path, use_cache=True):
+    """Serve conversion requests on a UNIX socket until interrupted.
+    
+    Keeps the interpreter and PyYAML loaded between conversions, so callers
+    converting many files don't pay the startup cost for each one. Returns
+    False if the socket can't be created, e.g. because another server is
+    already listening on `socket_path`.
+    """
+    # Replace a stale socket left behind by an earlier server, but leave one
+    # that a running server is still listening on alone
+    try:
+        if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+            print(f"Error: {socket_path} exists and is not a socket", file=sys.stderr)
+            return False
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(socket_path)
+            except ConnectionRefusedError:
+                os.unlink(socket_path)
+            else:
+                print(f"Error: A server is already listening on {socket_path}", file=sys.stderr)
+                return False
+    except FileNotFoundError:
+        pass
+    
+    # Create the socket owner-only from the start; chmod after bind would
+    # leave a window where other local users could connect
+    old_umask = os.umask(0o077)
+    try:
+        server = BridgeServer(socket_path, BridgeRequestHandler)
+    except OSError as e:
+        print(f"Error: Could not create socket {socket_path}: {e}", file=sys.stderr)
+        return False
+    finally:
+        os.umask(old_umask)
+    server.use_cache = use_cache
+    
+    # Shut down cleanly (removing the socket) when terminated
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        with contextlib.suppress(OSError):
+            os.unlink(socket_path)
+    return True
+
+# File extension used for each output format in batch mode. yaml isn't
+# offered: its outputs would be picked up as inputs by the next run.
+OUTPUT_EXTENSIONS = {'plist': 'plist', 'plist-binary': 'plist', 'plist-xml': 'plist',
+                     'json': 'json'}
+
+def convert_batch_file(input_file, output_format, use_cache=True, normalize=False):
+    """Convert one file for batch mode, writing `<input_file>.<ext>` next to it"""
+    # Prefix anything the conversion prints with the file it belongs to,
+    # since messages from all workers end up interleaved on one stderr
+    errors = io.StringIO()
+    with contextlib.redirect_stderr(errors):
+        result = convert_file(input_file, output_format, use_cache=use_cache, normalize=normalize)
+    for line in errors.getvalue().splitlines():
+        print(f"{input_file}: {line}", file=sys.stderr)
+    if result is None:
+        return False
+    try:
+        Path(f"{input_file}.{OUTPUT_EXTENSIONS[output_format]}").write_bytes(result)
+    except Exception as e:
+        print(f"Error writing output for {input_file}: {e}", file=sys.stderr)
+        return False
+    return True
+
+def run_batch(directory, output_format, use_cache=True, normalize=False):
+    """Convert every YAML file under a directory, one worker process per CPU.
+    
+    Returns the number of files that failed to convert.
+    """
+    # Only needed here; importing them up front slows every single-file run
+    import functools
+    import concurrent.futures
+    
+    yaml_files = sorted(str(path) for path in Path(directory).rglob('*')
+                        if path.suffix.lower() in ('.yaml', '.yml') and path.is_file())
+    convert = functools.partial(convert_batch_file, output_format=output_format,
+                                use_cache=use_cache, normalize=normalize)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        converted = sum(executor.map(convert, yaml_files, chunksize=8))
+    
+    print(f"Converted {converted} of {len(yaml_files)} YAML files", file=sys.stderr)
+    return len(yaml_files) - converted
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='yaml_bridge.py',
+        description='Convert Munki YAML, plist and JSON files between formats.')
+    parser.add_argument('input_file', nargs='?',
+                        help='YAML, plist or JSON file to convert')
+    parser.add_argument('output_format', nargs='?', type=str.lower,
+                        help='plist (binary), plist-binary, plist-xml, json or yaml')
+    parser.add_argument('--no-cache', action='store_true',
+                        help="don't read or write the parsed YAML cache")
+    parser.add_argument('--normalize', action='store_true',
+                        help='re-emit input that is already in the output format')
+    parser.add_argument('--server', metavar='SOCKET_PATH',
+                        help='serve conversion requests on a UNIX socket instead')
+    parser.add_argument('--batch', metavar='DIRECTORY',
+                        help='convert every YAML file under DIRECTORY to <file>.<format> '
+                             '(give only the output format: plist, plist-binary, plist-xml or json)')
+    options = parser.parse_args()
+    
+    if options.server:
+        if not run_server(options.server, use_cache=not options.no_cache):
+            sys.exit(1)
+        return
+    
+    if options.batch:
+        # Only the output format is given in batch mode
+        positionals = [arg for arg in (options.input_file, options.output_format) if arg]
+        if len(positionals) != 1:
+            parser.print_usage()
+            sys.exit(1)
+        output_format = positionals[0].lower()
+        if output_format not in OUTPUT_EXTENSIONS:
+            print("Error: Unsupported output format for batch mode", file=sys.stderr)
+            sys.exit(1)
+        if not os.path.isdir(options.batch):
+            print(f"Error: Directory not found: {options.batch}", file=sys.stderr)
+            sys.exit(1)
+        failures = run_batch(options.batch, output_format,
+                             use_cache=not options.no_cache, normalize=options.normalize)
+        sys.exit(1 if failures else 0)
+    
+    if options.input_file is None or options.output_format is None:
+        parser.print_usage()
         sys.exit(1)
     
-    if result:
-        print(result)
-    else:
+    # Write straight to stdout instead of collecting the output first
+    success = write_converted_file(options.input_file, options.output_format, sys.stdout.buffer,
+                                   use_cache=not options.no_cache, normalize=options.normalize)
+    sys.stdout.buffer.flush()
+    if not success:
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -72,6 +72,7 @@ DDLogLevel ddLogLevel;
 - (void)setupMappings;
 - (BOOL)runRepositoryPreSaveScript;
 - (BOOL)runRepositoryPostSaveScript;
+- (NSString *)yamlBridgeScriptPath;
 
 @end
 
@@ -3983,6 +3984,27 @@ static BOOL _isCurrentlyScanning = NO;
 
 // MARK: - YAML Python Bridge Methods (Deprecated - kept for fallback)
 
+// Single place to locate yaml_bridge.py. The script is copied flat into
+// Contents/Resources; when running from a build directory, fall back to
+// the copy in the source tree.
+- (NSString *)yamlBridgeScriptPath
+{
+    NSString *scriptPath = [[NSBundle mainBundle] pathForResource:@"yaml_bridge" ofType:@"py"];
+    if (scriptPath) {
+        return scriptPath;
+    }
+    
+    DDLogWarn(@"yaml_bridge.py not found in bundle, trying fallback location");
+    NSString *munkiAdminDir = [[[[NSBundle mainBundle] bundlePath] stringByDeletingLastPathComponent] stringByDeletingLastPathComponent];
+    scriptPath = [munkiAdminDir stringByAppendingPathComponent:@"MunkiAdmin/Scripts/yaml_bridge.py"];
+    if ([[NSFileManager defaultManager] fileExistsAtPath:scriptPath]) {
+        return scriptPath;
+    }
+    
+    DDLogError(@"yaml_bridge.py script not found");
+    return nil;
+}
+
 - (NSDictionary *)parseYAMLFileUsingPythonBridge:(NSURL *)fileURL
 {
     CFAbsoluteTime startTime = CFAbsoluteTimeGetCurrent();
@@ -3991,17 +4013,14 @@ static BOOL _isCurrentlyScanning = NO;
     DDLogInfo(@"[PERF] Starting YAML parse for: %@", fileName);
     
     // Find the yaml_bridge.py script in the app bundle
-    NSString *bundlePath = [[NSBundle mainBundle] bundlePath];
-    NSString *scriptPath = [bundlePath stringByAppendingPathComponent:@"Contents/Resources/Scripts/yaml_bridge.py"];
-    
-    if (![[NSFileManager defaultManager] fileExistsAtPath:scriptPath]) {
-        DDLogError(@"yaml_bridge.py script not found at: %@", scriptPath);
+    NSString *scriptPath = [self yamlBridgeScriptPath];
+    if (!scriptPath) {
         return nil;
     }
     
     NSTask *task = [[NSTask alloc] init];
     [task setLaunchPath:@"/usr/bin/python3"];
-    [task setArguments:@[scriptPath, [fileURL path]]];
+    [task setArguments:@[scriptPath, [fileURL path], @"plist-binary"]];
     
     NSPipe *outputPipe = [NSPipe pipe];
     NSPipe *errorPipe = [NSPipe pipe];
@@ -4051,20 +4070,22 @@ static BOOL _isCurrentlyScanning = NO;
             return nil;
         }
         
-        // Parse JSON output from yaml_bridge.py
-        NSError *jsonError;
-        id jsonObject = [NSJSONSerialization JSONObjectWithData:outputData
-                                                        options:0
-                                                          error:&jsonError];
-        if (jsonError) {
-            DDLogDebug(@"Failed to parse JSON from yaml_bridge output for %@: %@", fileName, jsonError.localizedDescription);
+        // Parse binary plist output from yaml_bridge.py
+        NSError *plistError;
+        NSPropertyListFormat plistFormat = NSPropertyListBinaryFormat_v1_0;
+        id plistObject = [NSPropertyListSerialization propertyListWithData:outputData
+                                                                   options:NSPropertyListImmutable
+                                                                    format:&plistFormat
+                                                                     error:&plistError];
+        if (!plistObject) {
+            DDLogDebug(@"Failed to parse plist from yaml_bridge output for %@: %@", fileName, plistError.localizedDescription);
             return nil;
         }
         
-        if ([jsonObject isKindOfClass:[NSDictionary class]]) {
+        if ([plistObject isKindOfClass:[NSDictionary class]]) {
             CFAbsoluteTime elapsed = (CFAbsoluteTimeGetCurrent() - startTime) * 1000.0;
             DDLogInfo(@"[PERF] Successfully converted YAML in %.1fms: %@", elapsed, fileName);
-            return (NSDictionary *)jsonObject;
+            return (NSDictionary *)plistObject;
         } else {
             CFAbsoluteTime elapsed = (CFAbsoluteTimeGetCurrent() - startTime) * 1000.0;
             DDLogDebug(@"[PERF] YAML conversion failed after %.1fms - non-dictionary object for: %@", elapsed, fileName);
@@ -4148,21 +4169,8 @@ static BOOL _isCurrentlyScanning = NO;
     DDLogInfo(@"Temporary JSON file written: %@", tempFilePath);
     
     // Find the YAML bridge script
-    NSString *bundlePath = [[NSBundle mainBundle] bundlePath];
-    NSString *scriptPath = [bundlePath stringByAppendingPathComponent:@"Contents/Resources/yaml_bridge.py"];
-    
-    DDLogInfo(@"Looking for script at: %@", scriptPath);
-    
-    if (![[NSFileManager defaultManager] fileExistsAtPath:scriptPath]) {
-        DDLogWarn(@"Script not found in bundle, trying fallback location");
-        NSString *munkiAdminDir = [bundlePath stringByDeletingLastPathComponent];
-        munkiAdminDir = [munkiAdminDir stringByDeletingLastPathComponent];
-        scriptPath = [munkiAdminDir stringByAppendingPathComponent:@"MunkiAdmin/Scripts/yaml_bridge.py"];
-        DDLogInfo(@"Trying fallback path: %@", scriptPath);
-    }
-    
-    if (![[NSFileManager defaultManager] fileExistsAtPath:scriptPath]) {
-        DDLogError(@"YAML bridge script not found");
+    NSString *scriptPath = [self yamlBridgeScriptPath];
+    if (!scriptPath) {
         [[NSFileManager defaultManager] removeItemAtPath:tempFilePath error:nil];
         return NO;
     }
@@ -4174,11 +4182,14 @@ static BOOL _isCurrentlyScanning = NO;
     [task setLaunchPath:@"/usr/bin/python3"];
     [task setArguments:@[scriptPath, tempFilePath, @"yaml"]];
     
+    // Keep stderr separate so bridge warnings never end up in the written YAML
     NSPipe *pipe = [NSPipe pipe];
+    NSPipe *errorPipe = [NSPipe pipe];
     [task setStandardOutput:pipe];
-    [task setStandardError:pipe];
+    [task setStandardError:errorPipe];
     
     NSFileHandle *file = [pipe fileHandleForReading];
+    NSFileHandle *errorFile = [errorPipe fileHandleForReading];
     
     BOOL success = NO;
     @try {
@@ -4199,12 +4210,13 @@ static BOOL _isCurrentlyScanning = NO;
                 DDLogError(@"No YAML data received from Python script");
             }
         } else {
-            NSData *errorData = [file readDataToEndOfFile];
+            NSData *errorData = [errorFile readDataToEndOfFile];
             NSString *errorString = [[NSString alloc] initWithData:errorData encoding:NSUTF8StringEncoding];
             DDLogError(@"Python script failed with exit status %d, error: %@", exitStatus, errorString);
         }
         
         [file closeFile];
+        [errorFile closeFile];
     }
     @catch (NSException *exception) {
         DDLogError(@"Exception in YAML writing: %@", exception.reason);
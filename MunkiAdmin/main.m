@@ -19,10 +19,9 @@ int main(int argc, char *argv[])
 			NSLog(@"Loading user defaults from YAML: %@", userDefaultsValuesPath);
 			
 			// Use yaml_bridge.py to convert YAML to NSDictionary
-			NSString *bundlePath = [[NSBundle mainBundle] bundlePath];
-			NSString *scriptPath = [bundlePath stringByAppendingPathComponent:@"Contents/Resources/yaml_bridge.py"];
+			NSString *scriptPath = [[NSBundle mainBundle] pathForResource:@"yaml_bridge" ofType:@"py"];
 			
-			if ([[NSFileManager defaultManager] fileExistsAtPath:scriptPath]) {
+			if (scriptPath) {
 				NSTask *task = [[NSTask alloc] init];
 				task.launchPath = @"/usr/bin/python3";
 				task.arguments = @[scriptPath, userDefaultsValuesPath, @"json"];